@@ -320,7 +320,7 @@ function addBubble(who, text) {
   }
 
   // --- Stock-backed autocomplete (Option B) ---
-  // Suggestions are built ONLY from the Excel stock list loaded into:
+  // Suggestions are built ONLY from the stock list (stock_codes.json, or the xlsx fallback) loaded into:
   //   window.keelieStockReady / window.keelieStockRows
   //
   // Supports:
@@ -544,7 +544,7 @@ function addBubble(who, text) {
       return;
     }
 
-    // Build stock suggestions ONLY from Excel list (product names + code prefixes).
+    // Build stock suggestions ONLY from the stock list (product names + code prefixes).
     let stockItems = [];
     if (typeof topProductNameSuggestions === "function") {
       stockItems = stockItems.concat(topProductNameSuggestions(query, 6));
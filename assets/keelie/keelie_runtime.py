@@ -3,7 +3,9 @@ import random
 import asyncio
 from dataclasses import dataclass
 from difflib import SequenceMatcher
-from typing import Dict, List, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 from js import window
 
@@ -14,6 +16,22 @@ CUSTOMER_SERVICE_URL = "https://www.keeltoys.com/contact-us/"
 MIN_ORDER_FIRST = 500
 MIN_ORDER_REPEAT = 250
 
+MIN_ORDER_INFO = (
+    "Our minimum order values are:\n"
+    f"• £{MIN_ORDER_FIRST} for first-time buyers\n"
+    f"• £{MIN_ORDER_REPEAT} for repeat buyers\n\n"
+    "If you’re unsure whether you qualify as a first-time or repeat buyer, "
+    "our customer service team can help:\n"
+    f"{CUSTOMER_SERVICE_URL}"
+)
+
+PRIVACY_WARNING = (
+    "For your privacy, please don’t share personal or account details here "
+    "(such as email addresses, phone numbers, or order/invoice references).\n\n"
+    "Our customer service team can help you securely here:\n"
+    f"{CUSTOMER_SERVICE_URL}"
+)
+
 PRODUCTION_INFO = (
     "Our toys are produced across a small number of trusted manufacturing partners:\n"
     "• 95% in China\n"
@@ -43,99 +61,148 @@ KEELECO_OVERVIEW = (
     "If you tell me which Keeleco sub-range you mean (e.g. *Keeleco Dinosaurs*), I can share details."
 )
 
-PENDING_STOCK_LOOKUP = False
-STOCK_ROWS: List[Dict[str, str]] = []  # loaded from JS Excel conversion
+@dataclass
+class ChatState:
+    pending_stock_lookup: bool = False  # last reply asked for a product name
+
+CHAT = ChatState()
 
-def clean_text(text: str) -> str:
-    text = (text or "").lower()
-    text = re.sub(r"[^a-z0-9\s&-]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+@dataclass(slots=True)
+class StockRow:
+    product_name: str  # stripped, original case
+    stock_code: str  # stripped, original case
+
+STOCK_ROWS: List[StockRow] = []  # window.keelieStockRows (stock_codes.json, or the xlsx fallback)
+PRODUCT_NAMES: List[str] = []  # lowercased product names, parallel to STOCK_ROWS
+PRODUCT_MATCHERS: List[SequenceMatcher] = []  # prebuilt for PRODUCT_NAMES
+TOKEN_INDEX: Dict[str, List[int]] = {}  # word -> indexes into PRODUCT_NAMES
+CODE_TO_NAME: Dict[str, str] = {}  # uppercased stock code -> product name
+
+class CleanTable(dict):
+    # str.translate table: keep a-z, 0-9, "&" and "-", blank everything else.
+    # Only ASCII is stored; any other code point falls through to a space.
+    def __missing__(self, key: int) -> str:
+        return " "
 
-def similarity(a: str, b: str) -> float:
-    return SequenceMatcher(None, a, b).ratio()
+CLEAN_TABLE = CleanTable({
+    c: chr(c) if chr(c) in "abcdefghijklmnopqrstuvwxyz0123456789&-" else " "
+    for c in range(128)
+})
+
+STOPWORDS_RE = re.compile(r"\b(of|for|a|an|the|to|me|my)\b")
+STOCK_CODE_RE = re.compile(r"\b[A-Za-z]{1,5}-?[A-Za-z]{0,5}-?\d{2,4}\b")
+
+def clean_text(text: str) -> str:
+    return " ".join((text or "").lower().translate(CLEAN_TABLE).split())
+
+def phrase_re(phrases: List[str]) -> "re.Pattern[str]":
+    # One compiled alternation answers any(p in text for p in phrases) in a
+    # single scan instead of a Python-level substring check per phrase.
+    return re.compile("|".join(re.escape(p) for p in phrases))
+
+def build_matchers(choices: List[str]) -> List[SequenceMatcher]:
+    # SequenceMatcher indexes its second sequence, so building one per choice
+    # up front leaves only the cheap set_seq1(query) for each lookup.
+    return [SequenceMatcher(None, "", choice) for choice in choices]
+
+def best_match_index(query: str, matchers: List[SequenceMatcher], cutoff: float,
+                     order: Optional[List[int]] = None) -> Optional[int]:
+    # Same result as taking the first max of SequenceMatcher ratio() over
+    # the choices, but cheap upper bounds (length, then character counts)
+    # skip choices that can't reach the cutoff or beat the best score so far.
+    # order only changes which choices are tried first; ties still go to the
+    # lowest index.
+    la = len(query)
+    best_index = None
+    best_score = 0.0
+    for i in (range(len(matchers)) if order is None else order):
+        matcher = matchers[i]
+        lb = len(matcher.b)
+        upper = 2.0 * min(la, lb) / (la + lb) if la + lb else 1.0
+        if upper < cutoff or upper < best_score or (upper == best_score and i > best_index):
+            continue
+        matcher.set_seq1(query)
+        upper = matcher.quick_ratio()
+        if upper < cutoff or upper < best_score or (upper == best_score and i > best_index):
+            continue
+        score = matcher.ratio()
+        if score >= cutoff and (score > best_score or (score == best_score and i < best_index)):
+            best_score = score
+            best_index = i
+    return best_index
 
 def extract_stock_code(text: str) -> Optional[str]:
-    matches = re.findall(r"\b[A-Z]{1,5}-?[A-Z]{0,5}-?\d{2,4}\b", (text or "").upper())
-    return matches[0] if matches else None
+    # Match either case and uppercase only the code, not the whole message.
+    m = STOCK_CODE_RE.search(text or "")
+    return m.group(0).upper() if m else None
+
+DELIVERY_TERMS_RE = phrase_re(["arrive", "arrival", "delivery", "eta", "tracking", "track", "order", "dispatch", "shipped"])
+DELIVERY_PHRASES_RE = phrase_re(["where is my order", "track my order", "order status"])
+
+def is_delivery_question(cleaned: str) -> bool:
+    return bool(("when" in cleaned) and DELIVERY_TERMS_RE.search(cleaned)) or bool(DELIVERY_PHRASES_RE.search(cleaned))
 
-def is_delivery_question(text: str) -> bool:
-    t = clean_text(text)
-    delivery_terms = ["arrive", "arrival", "delivery", "eta", "tracking", "track", "order", "dispatch", "shipped"]
-    return (("when" in t) and any(term in t for term in delivery_terms)) or any(
-        phrase in t for phrase in ["where is my order", "track my order", "order status"]
-    )
+STOCK_CODE_REQUEST_RE = phrase_re(["product code", "stock code", "sku", "item code", "code for", "code of"])
 
-def is_stock_code_request(text: str) -> bool:
-    t = clean_text(text)
-    triggers = ["product code", "stock code", "sku", "item code", "code for", "code of"]
-    return any(x in t for x in triggers)
+def is_stock_code_request(cleaned: str) -> bool:
+    return bool(STOCK_CODE_REQUEST_RE.search(cleaned))
+
+JUNK_PHRASES_RE = phrase_re([
+    "can you tell me", "could you tell me", "please", "what is", "whats",
+    "the product code", "product code", "stock code", "item code", "sku",
+    "code for", "code of"
+])
 
 def normalize_for_product_match(text: str) -> str:
-    t = clean_text(text)
-    junk_phrases = [
-        "can you tell me", "could you tell me", "please", "what is", "whats",
-        "the product code", "product code", "stock code", "item code", "sku",
-        "code for", "code of"
-    ]
-    for p in junk_phrases:
-        t = t.replace(p, " ")
-    t = re.sub(r"\b(of|for|a|an|the|to|me|my)\b", " ", t)
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
-
-def is_minimum_order_question(text: str) -> bool:
-    t = clean_text(text)
-    triggers = [
-        "minimum order", "minimum spend", "minimum purchase",
-        "min order", "min spend", "order minimum", "minimum order price",
-
-        "minimum value", "minimum order value", "minimum spend value",
-        "minimum order amount", "minimum spend amount",
-        "minimum basket", "minimum basket value",
-        "minimum checkout", "minimum checkout value",
-        "what is the minimum", "whats the minimum", "what's the minimum",
-        "opening order minimum", "first order minimum", "repeat order minimum",
-        "starting order", "trade minimum", "trade order minimum",
-
-        "moq", "m o q", "minimum order quantity",
-    ]
-    return any(x in t for x in triggers)
-
-def is_production_question(text: str) -> bool:
-    t = clean_text(text)
-    phrases = [
-        "where are your toys produced",
-        "where are your toys made",
-        "where are your toys manufactured",
-        "where are the toys produced",
-        "where are the toys made",
-        "where are the toys manufactured",
-        "where are they produced",
-        "where are they made",
-        "where are they manufactured",
-    ]
-    if any(p in t for p in phrases):
+    t = JUNK_PHRASES_RE.sub(" ", clean_text(text))
+    t = STOPWORDS_RE.sub(" ", t)
+    return " ".join(t.split())
+
+MINIMUM_ORDER_RE = phrase_re([
+    "minimum order", "minimum spend", "minimum purchase",
+    "min order", "min spend", "order minimum", "minimum order price",
+
+    "minimum value", "minimum order value", "minimum spend value",
+    "minimum order amount", "minimum spend amount",
+    "minimum basket", "minimum basket value",
+    "minimum checkout", "minimum checkout value",
+    "what is the minimum", "whats the minimum", "what's the minimum",
+    "opening order minimum", "first order minimum", "repeat order minimum",
+    "starting order", "trade minimum", "trade order minimum",
+
+    "moq", "m o q", "minimum order quantity",
+])
+
+def is_minimum_order_question(cleaned: str) -> bool:
+    return bool(MINIMUM_ORDER_RE.search(cleaned))
+
+# "where are your toys / the toys / they" + "produced / made / manufactured"
+PRODUCTION_PHRASES_RE = re.compile(r"where are (?:(?:your|the) toys|they) (?:produced|made|manufactured)")
+PRODUCTION_WORDS_RE = phrase_re(["produced", "made", "manufactured"])
+
+def is_production_question(cleaned: str) -> bool:
+    if PRODUCTION_PHRASES_RE.search(cleaned):
         return True
-    production_words = {"produced", "made", "manufactured"}
-    return ("where" in t) and ("toy" in t or "toys" in t) and any(w in t for w in production_words)
-
-def is_eco_question(text: str) -> bool:
+    return ("where" in cleaned) and ("toy" in cleaned or "toys" in cleaned) and bool(PRODUCTION_WORDS_RE.search(cleaned))
+
+ECO_RE = phrase_re([
+    "eco", "eco friendly", "eco-friendly",
+    "sustainable", "sustainability",
+    "environment", "environmentally friendly",
+    "recycled", "recycle", "recyclable",
+    "plastic bottles", "fsc",
+    "keeleco", "keel eco"
+])
+
+def is_eco_question(cleaned: str) -> bool:
     # If the user is asking for a stock code/SKU, "Keeleco" can appear as part of a product name.
     # In that case, we must NOT route to the eco/sustainability overview.
-    if is_stock_code_request(text) or extract_stock_code(text):
+    # Callers rule out a typed stock code first, on the raw message where they have it:
+    # cleaning can turn text like "x_ab12" into something that looks like a code.
+    if is_stock_code_request(cleaned):
         return False
 
-    t = clean_text(text)
-    triggers = [
-        "eco", "eco friendly", "eco-friendly",
-        "sustainable", "sustainability",
-        "environment", "environmentally friendly",
-        "recycled", "recycle", "recyclable",
-        "plastic bottles", "fsc",
-        "keeleco", "keel eco"
-    ]
-    return any(x in t for x in triggers)
+    return bool(ECO_RE.search(cleaned))
 
 
 
@@ -143,59 +210,47 @@ EMAIL_RE = re.compile(r"\b[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}\b", re.I)
 PHONE_RE = re.compile(r"(?:(?:\+|00)\s?\d{1,3}[\s-]?)?(?:\(?\d{2,5}\)?[\s-]?)?\d[\d\s-]{7,}\d")
 ORDER_CUE_RE = re.compile(r"\b(order|invoice|account|ref|reference|tracking|awb|consignment)\b", re.I)
 LONG_DIGITS_RE = re.compile(r"\b\d{6,}\b")
+DIGIT_RE = re.compile(r"\d")
 
 def contains_personal_info(text: str) -> bool:
     t = text or ""
-    if EMAIL_RE.search(t):
+    # An email needs an "@" and the other patterns need a digit. Most chat
+    # messages have neither, so check that before running the full scans.
+    if "@" in t and EMAIL_RE.search(t):
         return True
+    if not DIGIT_RE.search(t):
+        return False
     if PHONE_RE.search(t):
         return True
     if ORDER_CUE_RE.search(t) and LONG_DIGITS_RE.search(t):
         return True
     return False
 
-def privacy_warning() -> str:
-    return (
-        "For your privacy, please don’t share personal or account details here "
-        "(such as email addresses, phone numbers, or order/invoice references).\n\n"
-        "Our customer service team can help you securely here:\n"
-        f"{CUSTOMER_SERVICE_URL}"
-    )
-
-def is_help_question(text: str) -> bool:
-    t = clean_text(text)
-    triggers = [
-        "what can you help with",
-        "what can you do",
-        "what do you do",
-        "how can you help",
-        "what can i ask",
-        "what can i ask you",
-        "what questions can i ask",
-        "what are you for",
-        "what can keelie help with",
-        "how do you work",
-    ]
-    return any(x in t for x in triggers)
-
-
-def is_greeting(text: str) -> bool:
-    t = clean_text(text)
-    greetings = {
-        "hi", "hello", "hey", "hiya", "yo",
-        "good morning", "good afternoon", "good evening"
-    }
-    return (t in greetings) or any(t.startswith(g + " ") for g in greetings)
-
-def minimum_order_response() -> str:
-    return (
-        "Our minimum order values are:\n"
-        f"• £{MIN_ORDER_FIRST} for first-time buyers\n"
-        f"• £{MIN_ORDER_REPEAT} for repeat buyers\n\n"
-        "If you’re unsure whether you qualify as a first-time or repeat buyer, "
-        "our customer service team can help:\n"
-        f"{CUSTOMER_SERVICE_URL}"
-    )
+HELP_RE = phrase_re([
+    "what can you help with",
+    "what can you do",
+    "what do you do",
+    "how can you help",
+    "what can i ask",
+    "what can i ask you",
+    "what questions can i ask",
+    "what are you for",
+    "what can keelie help with",
+    "how do you work",
+])
+
+def is_help_question(cleaned: str) -> bool:
+    return bool(HELP_RE.search(cleaned))
+
+
+GREETINGS = frozenset({
+    "hi", "hello", "hey", "hiya", "yo",
+    "good morning", "good afternoon", "good evening"
+})
+GREETING_PREFIXES = tuple(g + " " for g in GREETINGS)
+
+def is_greeting(cleaned: str) -> bool:
+    return cleaned in GREETINGS or cleaned.startswith(GREETING_PREFIXES)
 
 async def load_stock_rows_from_js():
     global STOCK_ROWS
@@ -204,49 +259,66 @@ async def load_stock_rows_from_js():
             await window.keelieStockReady
 
         if hasattr(window, "keelieStockRows"):
-            STOCK_ROWS = [dict(r) for r in window.keelieStockRows.to_py()]
+            # Normalise each row once here so nothing downstream needs str()
+            # or strip() on the raw dicts.
+            STOCK_ROWS = [
+                StockRow(str(r.get("product_name", "")).strip(), str(r.get("stock_code", "")).strip())
+                for r in window.keelieStockRows.to_py()
+            ]
         else:
             STOCK_ROWS = []
     except Exception:
         STOCK_ROWS = []
+    index_stock_rows()
+
+def index_stock_rows():
+    global PRODUCT_NAMES, PRODUCT_MATCHERS, TOKEN_INDEX, CODE_TO_NAME
+    PRODUCT_NAMES = [row.product_name.lower() for row in STOCK_ROWS]
+    PRODUCT_MATCHERS = build_matchers(PRODUCT_NAMES)
+    TOKEN_INDEX = {}
+    for i, name in enumerate(PRODUCT_NAMES):
+        for token in set(name.split()):
+            TOKEN_INDEX.setdefault(token, []).append(i)
+    CODE_TO_NAME = {}
+    for row in STOCK_ROWS:
+        CODE_TO_NAME.setdefault(row.stock_code.upper(), row.product_name)
+    classify_message.cache_clear()  # cached replies may depend on the old rows
+
+def product_search_order(query: str) -> List[int]:
+    # Rows sharing a word with the query go first, so a strong score is found
+    # early and the bounds in best_match_index skip most of the other rows.
+    candidates = set()
+    for token in query.split():
+        candidates.update(TOKEN_INDEX.get(token, ()))
+    rest = [i for i in range(len(PRODUCT_NAMES)) if i not in candidates]
+    return sorted(candidates) + rest
 
 def lookup_stock_code(user_text: str) -> str:
     if not STOCK_ROWS:
         return (
-            "I can’t access stock codes right now (stock_codes.xlsx may be missing or unreadable). "
+            "I can’t access stock codes right now (the stock list may be missing or unreadable). "
             f"Please contact customer service here:\n{CUSTOMER_SERVICE_URL}"
         )
 
     query = normalize_for_product_match(user_text)
 
-    best_row = None
-    best_score = 0.0
-    for row in STOCK_ROWS:
-        name = str(row.get("product_name", "")).lower().strip()
-        score = similarity(query, name)
-        if score > best_score:
-            best_score = score
-            best_row = row
-
-    if best_score < 0.6 or not best_row:
+    idx = best_match_index(query, PRODUCT_MATCHERS, cutoff=0.6, order=product_search_order(query))
+    if idx is None:
         return "I’m not sure which product you mean. Could you please provide the product name?"
 
-    product = str(best_row.get("product_name", "")).strip().title()
-    code = str(best_row.get("stock_code", "")).strip()
+    best_row = STOCK_ROWS[idx]
+    product = best_row.product_name.title()
+    code = best_row.stock_code
     return f"The stock code for **{product}** is **{code}**."
 
 def lookup_product_by_code(code: str) -> Optional[str]:
-    if not STOCK_ROWS:
-        return None
     code = code.upper().strip()
-    for row in STOCK_ROWS:
-        c = str(row.get("stock_code", "")).upper().strip()
-        if c == code:
-            product = str(row.get("product_name", "")).strip().title()
-            return f"The product with stock code **{code}** is **{product}**."
-    return None
+    name = CODE_TO_NAME.get(code)
+    if name is None:
+        return None
+    return f"The product with stock code **{code}** is **{name.title()}**."
 
-COLLECTION_FACTS: Dict[str, Dict[str, List[str]]] = {
+_COLLECTION_FACTS: Dict[str, Dict[str, Any]] = {
     "keeleco": {
         "title": "Keeleco®",
         "facts": [
@@ -478,65 +550,78 @@ COLLECTION_FACTS: Dict[str, Dict[str, List[str]]] = {
     },
 }
 
+# Read-only view of the table above, which nothing else reads. COLLECTION_KEYS
+# and COLLECTION_REPLIES are derived from it once and are read-only too, so
+# none of them can drift out of step with the others.
+COLLECTION_FACTS: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    key: MappingProxyType({"title": info["title"], "facts": tuple(info["facts"])})
+    for key, info in _COLLECTION_FACTS.items()
+})
+
+# Longest first so "keeleco dinosaurs" wins over "keeleco"; ties keep dict order.
+COLLECTION_KEYS: Tuple[str, ...] = tuple(sorted(COLLECTION_FACTS.keys(), key=len, reverse=True))
+
 def detect_collection(cleaned_text: str) -> Optional[str]:
-    keys = sorted(COLLECTION_FACTS.keys(), key=len, reverse=True)
-    for k in keys:
+    for k in COLLECTION_KEYS:
         if k in cleaned_text:
             return k
     return None
 
-def collections_overview() -> str:
-    kee_sub = [
-        "Keeleco Adoptable World",
-        "Keeleco Arctic & Sealife",
-        "Keeleco Baby",
-        "Keeleco Botanical Garden",
-        "Keeleco British Wildlife & Farm",
-        "Keeleco Collectables",
-        "Keeleco Dinosaurs",
-        "Keeleco Enchanted World",
-        "Keeleco Handpuppets",
-        "Keeleco Jungle Cats",
-        "Keeleco Monkeys & Apes",
-        "Keeleco Pets",
-        "Keeleco Pink",
-        "Keeleco Snackies",
-        "Keeleco Teddies",
-        "Keeleco Wild",
-    ]
-    others = [
-        "Love To Hug",
-        "Motsu",
-        "Pippins",
-        "Pugsley & Friends",
-        "Seasonal",
-        "Signature Cuddle Puppies",
-        "Signature Cuddle Teddies",
-        "Signature Cuddle Wild",
-        "Signature Forever Puppies",
-        "Souvenir",
-    ]
-    return (
-        "Here are our main collections/ranges:\n\n"
-        "Keeleco® sub-ranges:\n"
-        + "\n".join([f"• {x}" for x in kee_sub]) +
-        "\n\nOther collections:\n"
-        + "\n".join([f"• {x}" for x in others]) +
-        "\n\nTell me which one you’re interested in and I’ll share some facts about it."
-    )
+KEELECO_SUB_RANGES = [
+    "Keeleco Adoptable World",
+    "Keeleco Arctic & Sealife",
+    "Keeleco Baby",
+    "Keeleco Botanical Garden",
+    "Keeleco British Wildlife & Farm",
+    "Keeleco Collectables",
+    "Keeleco Dinosaurs",
+    "Keeleco Enchanted World",
+    "Keeleco Handpuppets",
+    "Keeleco Jungle Cats",
+    "Keeleco Monkeys & Apes",
+    "Keeleco Pets",
+    "Keeleco Pink",
+    "Keeleco Snackies",
+    "Keeleco Teddies",
+    "Keeleco Wild",
+]
+
+OTHER_COLLECTIONS = [
+    "Love To Hug",
+    "Motsu",
+    "Pippins",
+    "Pugsley & Friends",
+    "Seasonal",
+    "Signature Cuddle Puppies",
+    "Signature Cuddle Teddies",
+    "Signature Cuddle Wild",
+    "Signature Forever Puppies",
+    "Souvenir",
+]
+
+COLLECTIONS_OVERVIEW = (
+    "Here are our main collections/ranges:\n\n"
+    "Keeleco® sub-ranges:\n"
+    + "\n".join([f"• {x}" for x in KEELECO_SUB_RANGES]) +
+    "\n\nOther collections:\n"
+    + "\n".join([f"• {x}" for x in OTHER_COLLECTIONS]) +
+    "\n\nTell me which one you’re interested in and I’ll share some facts about it."
+)
+
+COLLECTION_REPLIES: Mapping[str, str] = MappingProxyType({
+    key: f"Here’s an overview of **{info['title']}**:\n" + "\n".join(f"• {f}" for f in info["facts"])
+    for key, info in COLLECTION_FACTS.items()
+})
 
 def collection_reply(cleaned_text: str) -> str:
     key = detect_collection(cleaned_text)
     if not key:
-        return collections_overview()
-
-    info = COLLECTION_FACTS[key]
-    facts = "\n".join([f"• {f}" for f in info["facts"]])
+        return COLLECTIONS_OVERVIEW
 
-    if key == "keeleco" and is_eco_question(cleaned_text):
+    if key == "keeleco" and not extract_stock_code(cleaned_text) and is_eco_question(cleaned_text):
         return KEELECO_OVERVIEW
 
-    return f"Here’s an overview of **{info['title']}**:\n{facts}"
+    return COLLECTION_REPLIES[key]
 
 FAQ = {
     "tell me about keel toys":
@@ -547,16 +632,13 @@ FAQ = {
         "All Keel Toys products are designed and tested to meet UK and EU safety standards.",
 }
 
-def best_faq_answer(user_text: str, threshold: float = 0.55) -> Optional[str]:
-    q = clean_text(user_text)
-    best = None
-    best_score = 0.0
-    for k, v in FAQ.items():
-        s = similarity(q, k)
-        if s > best_score:
-            best_score = s
-            best = v
-    return best if best_score >= threshold else None
+FAQ_QUESTIONS = [clean_text(k) for k in FAQ]  # cleaned like the user text they're compared to
+FAQ_ANSWERS = list(FAQ.values())
+FAQ_MATCHERS = build_matchers(FAQ_QUESTIONS)
+
+def best_faq_answer(cleaned_text: str, threshold: float = 0.55) -> Optional[str]:
+    idx = best_match_index(cleaned_text, FAQ_MATCHERS, cutoff=threshold)
+    return FAQ_ANSWERS[idx] if idx is not None else None
 
 @dataclass
 class Intent:
@@ -685,97 +767,105 @@ FALLBACK = (
     f"{CUSTOMER_SERVICE_URL}"
 )
 
+# Highest score each intent could reach if every one of its keywords matched.
+INTENT_MAX_SCORES = {name: intent.priority * sum(intent.keywords.values()) for name, intent in INTENTS.items()}
+# Keyword weights as flat (phrase, weight) pairs, which iterate faster than dict items.
+INTENT_KEYWORDS = {name: tuple(intent.keywords.items()) for name, intent in INTENTS.items()}
+
 def detect_intent(cleaned_text: str) -> Optional[str]:
     best_intent = None
     best_score = 0
     for name, intent in INTENTS.items():
-        score = sum(weight for phrase, weight in intent.keywords.items() if phrase in cleaned_text)
+        if INTENT_MAX_SCORES[name] <= best_score:
+            continue
+        score = sum(weight for phrase, weight in INTENT_KEYWORDS[name] if phrase in cleaned_text)
         score *= intent.priority
         if score > best_score:
             best_score = score
             best_intent = name
     return best_intent if best_score > 0 else None
 
-def keelie_reply(user_input: str) -> str:
-    global PENDING_STOCK_LOOKUP
+COLLECTION_CUE_RE = phrase_re(["range", "ranges", "collection", "collections", "our collections"])
 
+@lru_cache(maxsize=256)
+def classify_message(user_input: str, pending: bool) -> Tuple[Optional[str], str, bool]:
+    # The deterministic part of keelie_reply: the same message and pending flag
+    # always take the same branch, so repeated questions come from the cache.
+    # Returns (intent, reply, pending). When intent is set, the caller picks one
+    # of that intent's responses instead of using reply.
     cleaned = clean_text(user_input)
 
     if contains_personal_info(user_input):
-        PENDING_STOCK_LOOKUP = False
-        return privacy_warning()
+        return None, PRIVACY_WARNING, False
 
-    if is_greeting(user_input):
-        PENDING_STOCK_LOOKUP = False
-        return random.choice(INTENTS["greeting"].responses)
+    if is_greeting(cleaned):
+        return "greeting", "", False
 
-    if is_help_question(user_input):
-        PENDING_STOCK_LOOKUP = False
-        return HELP_OVERVIEW
+    if is_help_question(cleaned):
+        return None, HELP_OVERVIEW, False
 
-    if any(x in cleaned for x in ["range", "ranges", "collection", "collections", "our collections"]):
-        PENDING_STOCK_LOOKUP = False
-        return collection_reply(cleaned)
+    if COLLECTION_CUE_RE.search(cleaned):
+        return None, collection_reply(cleaned), False
 
     if detect_collection(cleaned):
-        PENDING_STOCK_LOOKUP = False
-        return collection_reply(cleaned)
+        return None, collection_reply(cleaned), False
 
-    if is_delivery_question(user_input):
-        PENDING_STOCK_LOOKUP = False
-        return random.choice(INTENTS["delivery_time"].responses)
+    if is_delivery_question(cleaned):
+        return "delivery_time", "", False
 
-    if is_minimum_order_question(user_input):
-        PENDING_STOCK_LOOKUP = False
-        return minimum_order_response()
+    if is_minimum_order_question(cleaned):
+        return None, MIN_ORDER_INFO, False
 
-    if is_production_question(user_input):
-        PENDING_STOCK_LOOKUP = False
-        return PRODUCTION_INFO
+    if is_production_question(cleaned):
+        return None, PRODUCTION_INFO, False
 
 
-    if PENDING_STOCK_LOOKUP:
+    if pending:
         result = lookup_stock_code(user_input)
         if "I’m not sure which product you mean" in result:
-            return "Please type the product name (e.g., “[product name]”)."
-        PENDING_STOCK_LOOKUP = False
-        return result
+            return None, "Please type the product name (e.g., “[product name]”).", True
+        return None, result, False
 
-    if is_stock_code_request(user_input):
+    if is_stock_code_request(cleaned):
         result = lookup_stock_code(user_input)
         if "I’m not sure which product you mean" in result:
-            PENDING_STOCK_LOOKUP = True
-            return "Sure — what’s the product name?"
-        return result
+            return None, "Sure — what’s the product name?", True
+        return None, result, False
 
     code = extract_stock_code(user_input)
     if code:
-        PENDING_STOCK_LOOKUP = False
         found = lookup_product_by_code(code)
-        return found if found else (
+        return None, found if found else (
             f"I couldn’t find a product with the stock code **{code}**. "
             "Please check the code and try again."
-        )
+        ), False
 
-    if is_eco_question(user_input):
-        PENDING_STOCK_LOOKUP = False
+    if is_eco_question(cleaned):
         if detect_collection(cleaned):
-            return collection_reply(cleaned)
-        return KEELECO_OVERVIEW
+            return None, collection_reply(cleaned), False
+        return None, KEELECO_OVERVIEW, False
 
 
     intent = detect_intent(cleaned)
     if intent:
-        PENDING_STOCK_LOOKUP = False
-        return random.choice(INTENTS[intent].responses)
+        return intent, "", False
 
     faq = best_faq_answer(cleaned)
     if faq:
-        PENDING_STOCK_LOOKUP = False
-        return faq
+        return None, faq, False
 
-    PENDING_STOCK_LOOKUP = False
-    return FALLBACK
+    return None, FALLBACK, False
+
+def keelie_reply(user_input: str) -> str:
+    # The only place chat state is written.
+    intent, reply, CHAT.pending_stock_lookup = classify_message(user_input, CHAT.pending_stock_lookup)
+    if intent:
+        return random.choice(INTENTS[intent].responses)
+    return reply
+
+# Replies go out one at a time, in the order messages were sent: a quick
+# cached answer must not overtake a slower one that is still "typing".
+REPLY_LOCK = asyncio.Lock()
 
 async def send_message():
     msg = (window.keelieGetInput() or "").strip()
@@ -785,24 +875,36 @@ async def send_message():
     window.keelieClearInput()
     window.keelieAddBubble("You", msg)
 
-    if hasattr(window, "keelieShowStatus"):
-        window.keelieShowStatus("Keelie is thinking…")
+    async with REPLY_LOCK:
+        if hasattr(window, "keelieShowStatus"):
+            window.keelieShowStatus("Keelie is thinking…")
+
+        # Let the status render before a slow (uncached) lookup runs.
+        await asyncio.sleep(0)
 
-    await asyncio.sleep(random.uniform(0.4, 0.8))
+        hits = classify_message.cache_info().hits
+        reply = keelie_reply(msg)
+        # A repeated question is answered from the cache, so skip the "thinking"
+        # pause and keep the typing one short.
+        cached = classify_message.cache_info().hits > hits
 
-    if hasattr(window, "keelieShowStatus"):
-        window.keelieShowStatus("Keelie is typing…")
+        if not cached:
+            await asyncio.sleep(random.uniform(0.4, 0.8))
 
-    base = 0.35
-    per_char = min(len(msg) * 0.01, 1.0)
-    await asyncio.sleep(base + per_char)
+        if hasattr(window, "keelieShowStatus"):
+            window.keelieShowStatus("Keelie is typing…")
 
-    if hasattr(window, "keelieClearStatus"):
-        window.keelieClearStatus()
+        if cached:
+            await asyncio.sleep(0.15)
+        else:
+            base = 0.35
+            per_char = min(len(msg) * 0.01, 1.0)
+            await asyncio.sleep(base + per_char)
 
-    reply = keelie_reply(msg)
+        if hasattr(window, "keelieClearStatus"):
+            window.keelieClearStatus()
 
-    window.keelieAddBubble("Keelie", reply)
+        window.keelieAddBubble("Keelie", reply)
 
 
 async def boot():
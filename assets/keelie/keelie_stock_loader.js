@@ -5,6 +5,16 @@
   const excelUrl = (scriptEl && scriptEl.getAttribute("data-keelie-excel-url"))
     ? scriptEl.getAttribute("data-keelie-excel-url")
     : "assets/keelie/stock_codes.xlsx";
+  // Pre-exported rows (tools/export_stock_codes.py). Preferred over the xlsx so
+  // the page doesn't need SheetJS at all unless this file is missing. Re-export
+  // after editing the xlsx; `python tools/export_stock_codes.py --check` fails
+  // if the two have drifted apart.
+  const jsonUrl = (scriptEl && scriptEl.getAttribute("data-keelie-json-url"))
+    ? scriptEl.getAttribute("data-keelie-json-url")
+    : "assets/keelie/stock_codes.json";
+  const sheetJsUrl = (scriptEl && scriptEl.getAttribute("data-keelie-sheetjs-url"))
+    ? scriptEl.getAttribute("data-keelie-sheetjs-url")
+    : "https://cdn.jsdelivr.net/npm/xlsx@0.18.5/dist/xlsx.full.min.js";
 
   window.keelieStockRows = Array.isArray(window.keelieStockRows) ? window.keelieStockRows : [];
 
@@ -15,67 +25,109 @@
       .replace(/\s+/g, "_");
   }
 
-  async function loadStockFromExcel() {
+  function loadSheetJs() {
+    if (window.XLSX) return Promise.resolve(true);
+    return new Promise((resolve) => {
+      const s = document.createElement("script");
+      s.src = sheetJsUrl;
+      s.onload = () => resolve(!!window.XLSX);
+      s.onerror = () => resolve(false);
+      document.head.appendChild(s);
+    });
+  }
+
+  async function loadStockFromJson() {
     try {
-      if (!window.XLSX) {
-        console.warn("Keelie: SheetJS (XLSX) not found. Stock codes will be unavailable.");
-        window.keelieStockRows = [];
-        return;
-      }
+      // "no-cache" still revalidates on every load, but an unchanged file comes
+      // back as a 304 from the browser cache instead of a full download.
+      const res = await fetch(jsonUrl, { cache: "no-cache" });
+      if (!res.ok) return [];
 
-      const res = await fetch(excelUrl, { cache: "no-store" });
-      if (!res.ok) {
-        console.warn("Keelie: stock_codes.xlsx not found:", res.status);
-        window.keelieStockRows = [];
-        return;
-      }
+      const data = await res.json();
+      if (!Array.isArray(data)) return [];
+
+      return data
+        .map((r) => ({
+          product_name: String((r && r.product_name) || "").trim(),
+          stock_code: String((r && r.stock_code) || "").trim(),
+        }))
+        .filter((r) => r.product_name && r.stock_code);
+    } catch (e) {
+      return [];
+    }
+  }
+
+  async function loadStockFromWorkbook() {
+    if (!(await loadSheetJs())) {
+      console.warn("Keelie: SheetJS (XLSX) not found. Stock codes will be unavailable.");
+      return [];
+    }
+
+    const res = await fetch(excelUrl, { cache: "no-cache" });
+    if (!res.ok) {
+      console.warn("Keelie: stock_codes.xlsx not found:", res.status);
+      return [];
+    }
+
+    const buf = await res.arrayBuffer();
+    const wb = window.XLSX.read(buf, { type: "array" });
+
+    const sheetName = wb.SheetNames[0];
+    const ws = wb.Sheets[sheetName];
+    const rawRows = window.XLSX.utils.sheet_to_json(ws, { defval: "" });
 
-      const buf = await res.arrayBuffer();
-      const wb = window.XLSX.read(buf, { type: "array" });
+    let rows = rawRows
+      .map((r) => {
+        const obj = {};
+        for (const [k, v] of Object.entries(r)) obj[normKey(k)] = String(v).trim();
+        return {
+          product_name: obj.product_name || obj.product || obj.name || "",
+          stock_code: obj.stock_code || obj.sku || obj.code || "",
+        };
+      })
+      .filter((r) => r.product_name && r.stock_code);
 
-      const sheetName = wb.SheetNames[0];
-      const ws = wb.Sheets[sheetName];
-      const rawRows = window.XLSX.utils.sheet_to_json(ws, { defval: "" });
 
-      let rows = rawRows
+    if (rows.length === 0) {
+      const matrix = window.XLSX.utils.sheet_to_json(ws, { header: 1, defval: "" });
+      const alt = (matrix || [])
         .map((r) => {
-          const obj = {};
-          for (const [k, v] of Object.entries(r)) obj[normKey(k)] = String(v).trim();
-          return {
-            product_name: obj.product_name || obj.product || obj.name || "",
-            stock_code: obj.stock_code || obj.sku || obj.code || "",
-          };
+          const stock = String((r && r[0]) || "").trim();
+          const name = String((r && r[1]) || "").trim();
+          return { product_name: name, stock_code: stock };
         })
         .filter((r) => r.product_name && r.stock_code);
 
+      if (alt.length) rows = alt;
+    }
+
+    return rows;
+  }
+
+  async function loadStockRows() {
+    let source = jsonUrl;
+    try {
+      let rows = await loadStockFromJson();
 
       if (rows.length === 0) {
-        const matrix = window.XLSX.utils.sheet_to_json(ws, { header: 1, defval: "" });
-        const alt = (matrix || [])
-          .map((r) => {
-            const stock = String((r && r[0]) || "").trim();
-            const name = String((r && r[1]) || "").trim();
-            return { product_name: name, stock_code: stock };
-          })
-          .filter((r) => r.product_name && r.stock_code);
-
-        if (alt.length) rows = alt;
+        source = excelUrl;
+        rows = await loadStockFromWorkbook();
       }
 
       window.keelieStockRows = rows;
-      console.log(`Keelie: Loaded ${rows.length} stock rows from Excel.`);
+      console.log(`Keelie: Loaded ${rows.length} stock rows from ${source}.`);
 
       if (rows.length > 0 && rows.length < 10) {
         console.warn(
-          "Keelie: Loaded a very small number of stock rows. Check the Excel URL/contents:",
-          excelUrl
+          "Keelie: Loaded a very small number of stock rows. Check the stock file URL/contents:",
+          source
         );
       }
     } catch (e) {
-      console.error("Keelie: failed to load/parse Excel", e);
+      console.error("Keelie: failed to load/parse stock rows from", source, e);
       window.keelieStockRows = [];
     }
   }
 
-  window.keelieStockReady = loadStockFromExcel();
+  window.keelieStockReady = loadStockRows();
 })();
@@ -0,0 +1,147 @@
+"""Export assets/keelie/stock_codes.xlsx to assets/keelie/stock_codes.json.
+
+The site loads the JSON file so browsers don't have to download SheetJS and
+parse the workbook on every page load. Re-run this after editing the xlsx:
+
+    python tools/export_stock_codes.py
+
+The site prefers the JSON whenever it exists, so a stale export is served
+without any warning. Check that the committed JSON still matches the xlsx
+(exits 1 if it doesn't):
+
+    python tools/export_stock_codes.py --check
+
+Column handling mirrors keelie_stock_loader.js: headers are normalised
+(trimmed, lowercased, spaces -> "_"), product_name/product/name and
+stock_code/sku/code are accepted, and if no header matches, column A is read
+as the stock code and column B as the product name. Standard library only.
+"""
+import argparse
+import json
+import re
+import sys
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+XLSX_PATH = ROOT / "assets" / "keelie" / "stock_codes.xlsx"
+JSON_PATH = ROOT / "assets" / "keelie" / "stock_codes.json"
+
+NS = {
+    "m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+
+def norm_key(k: str) -> str:
+    return re.sub(r"\s+", "_", str(k or "").strip().lower())
+
+def column_index(ref: str) -> int:
+    n = 0
+    for ch in re.match(r"[A-Z]+", ref).group(0):
+        n = n * 26 + (ord(ch) - 64)
+    return n - 1
+
+def cell_text(cell: ET.Element, shared: List[str]) -> str:
+    kind = cell.get("t")
+    if kind == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter(f"{{{NS['m']}}}t"))
+    v = cell.find("m:v", NS)
+    if v is None or v.text is None:
+        return ""
+    if kind == "s":
+        return shared[int(v.text)]
+    if kind == "b":
+        return "TRUE" if v.text == "1" else "FALSE"
+    if kind in (None, "n"):
+        num = float(v.text)
+        return str(int(num)) if num.is_integer() else v.text
+    return v.text
+
+def read_first_sheet(path: Path) -> List[List[str]]:
+    with zipfile.ZipFile(path) as z:
+        shared: List[str] = []
+        if "xl/sharedStrings.xml" in z.namelist():
+            sst = ET.fromstring(z.read("xl/sharedStrings.xml"))
+            shared = [
+                "".join(t.text or "" for t in si.iter(f"{{{NS['m']}}}t"))
+                for si in sst.findall("m:si", NS)
+            ]
+
+        workbook = ET.fromstring(z.read("xl/workbook.xml"))
+        first = workbook.find("m:sheets/m:sheet", NS)
+        rel_id = first.get(f"{{{NS['r']}}}id")
+        rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+        target = next(r.get("Target") for r in rels.findall("rel:Relationship", NS) if r.get("Id") == rel_id)
+        sheet_path = target.lstrip("/") if target.startswith("/") else "xl/" + target
+
+        sheet = ET.fromstring(z.read(sheet_path))
+        rows = []
+        for row in sheet.findall("m:sheetData/m:row", NS):
+            values: Dict[int, str] = {}
+            for cell in row.findall("m:c", NS):
+                values[column_index(cell.get("r"))] = cell_text(cell, shared).strip()
+            width = max(values) + 1 if values else 0
+            rows.append([values.get(i, "") for i in range(width)])
+        return rows
+
+def to_stock_rows(matrix: List[List[str]]) -> List[Dict[str, str]]:
+    if not matrix:
+        return []
+
+    header = [norm_key(h) for h in matrix[0]]
+    rows = []
+    for values in matrix[1:]:
+        obj = {k: (values[i] if i < len(values) else "") for i, k in enumerate(header)}
+        rows.append({
+            "product_name": obj.get("product_name") or obj.get("product") or obj.get("name") or "",
+            "stock_code": obj.get("stock_code") or obj.get("sku") or obj.get("code") or "",
+        })
+    rows = [r for r in rows if r["product_name"] and r["stock_code"]]
+
+    if not rows:
+        rows = [
+            {"product_name": r[1] if len(r) > 1 else "", "stock_code": r[0] if r else ""}
+            for r in matrix
+        ]
+        rows = [r for r in rows if r["product_name"] and r["stock_code"]]
+
+    return rows
+
+def render_json(rows: List[Dict[str, str]]) -> str:
+    # One row per line keeps the file compact and its diffs readable.
+    body = ",\n".join(json.dumps(r, ensure_ascii=False) for r in rows)
+    return "[\n" + body + "\n]\n"
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Export stock_codes.xlsx to stock_codes.json.")
+    parser.add_argument("--check", action="store_true",
+                        help="don't write; exit 1 if stock_codes.json is missing or out of date")
+    args = parser.parse_args(argv)
+
+    rows = to_stock_rows(read_first_sheet(XLSX_PATH))
+    text = render_json(rows)
+    json_name = JSON_PATH.relative_to(ROOT)
+
+    if args.check:
+        try:
+            with open(JSON_PATH, encoding="utf-8", newline="") as f:
+                current = f.read()
+        except FileNotFoundError:
+            current = None
+        if current != text.replace("\n", "\r\n"):
+            print(f"{json_name} is out of date with {XLSX_PATH.relative_to(ROOT)}; "
+                  "run python tools/export_stock_codes.py", file=sys.stderr)
+            return 1
+        print(f"{json_name} is up to date ({len(rows)} stock rows)")
+        return 0
+
+    with open(JSON_PATH, "w", encoding="utf-8", newline="\r\n") as f:
+        f.write(text)
+    print(f"Wrote {len(rows)} stock rows to {json_name}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))